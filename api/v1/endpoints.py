@@ -1,25 +1,57 @@
-from fastapi import APIRouter
-from db.handler import DBHandler
+from typing import Optional
+from fastapi import APIRouter, Request
+from fastapi.concurrency import run_in_threadpool
+from core.parser import rebuild_database
+from db.sharded import create_db_handler
+from services.consistency import get_consistency_report
+from utils.http_cache import (
+    cached_json_response,
+    etag_matches,
+    make_etag,
+    not_modified_response,
+)
 import logging
+import threading
 
 router = APIRouter()
-db_handler = DBHandler()
+db_handler = create_db_handler()
 logger = logging.getLogger(__name__)
+rebuild_lock = threading.Lock()
 
 
 # Основной эндпоинт апи для поиска
 @router.get("/search")
 async def search_translations(
+    request: Request,
     query: str,
     search_in_original: bool = True,
     search_in_translated: bool = True,
     case_insensitive: bool = True,
     offset: int = 0,
     limit: int = 20,
+    plugin: Optional[str] = None,
 ):
     try:
         logger.info(f"Поиск перевода для запроса: {query}")
 
+        # Ответ зависит только от параметров и содержимого базы, поэтому
+        # повторный запрос с тем же ETag обслуживается без обращения к SQLite
+        etag = make_etag(
+            db_handler.generation,
+            {
+                "query": query,
+                "search_in_original": search_in_original,
+                "search_in_translated": search_in_translated,
+                "case_insensitive": case_insensitive,
+                "offset": offset,
+                "limit": limit,
+                "plugin": plugin,
+            },
+        )
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            logger.debug(f"ETag совпал, ответ 304: {etag}")
+            return not_modified_response(etag)
+
         logger.debug(f"Параметры поиска: query={query}, offset={offset}, limit={limit}")
         try:
             results, matches, total = db_handler.search_translations(
@@ -29,6 +61,7 @@ async def search_translations(
                 case_insensitive=case_insensitive,
                 offset=offset,
                 limit=limit,
+                plugin_name=plugin,
             )
             logger.debug(f"Получено результатов: {len(results)}")
         except Exception as e:
@@ -44,7 +77,45 @@ async def search_translations(
         if results:
             logger.debug(f"Пример результата: {results[0]}")
 
-        return response
+        return cached_json_response(
+            response, etag, request.headers.get("accept-encoding")
+        )
     except Exception as e:
         logger.error(f"Ошибка при поиске: {e}", exc_info=True)
         return {"results": [], "error": str(e)}
+
+
+# Отчёт о расходящихся переводах одинаковых оригинальных строк
+@router.get("/consistency")
+async def consistency_report(offset: int = 0, limit: int = 50):
+    try:
+        generation = db_handler.generation
+        report = await run_in_threadpool(
+            get_consistency_report, db_handler.database_files(), generation
+        )
+        return {
+            "groups": report[offset : offset + limit],
+            "stats": {"divergent": len(report)},
+        }
+    except Exception as e:
+        logger.error(f"Ошибка при построении отчёта: {e}", exc_info=True)
+        return {"groups": [], "error": str(e)}
+
+
+def _run_rebuild():
+    try:
+        plugins = rebuild_database("skyrim_strings", db_handler)
+        logger.info(f"Пересборка базы завершена: {plugins} плагинов")
+    except Exception as e:
+        logger.error(f"Ошибка при пересборке базы: {e}", exc_info=True)
+    finally:
+        rebuild_lock.release()
+
+
+# Пересборка базы в теневой файл без остановки поиска
+@router.post("/rebuild")
+async def rebuild():
+    if not rebuild_lock.acquire(blocking=False):
+        return {"status": "running"}
+    threading.Thread(target=_run_rebuild, name="db-rebuild", daemon=True).start()
+    return {"status": "started"}
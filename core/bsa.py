@@ -0,0 +1,192 @@
+import logging
+import struct
+import zlib
+from pathlib import Path
+from typing import Dict, List
+
+try:
+    import lz4.frame  # type: ignore[import]
+except ImportError:  # LZ4 нужен только для архивов Skyrim SE (v105)
+    lz4 = None
+
+BSA_MAGIC = b"BSA\x00"
+
+# Флаги архива
+ARCHIVE_DIRECTORY_NAMES = 0x1
+ARCHIVE_FILE_NAMES = 0x2
+ARCHIVE_COMPRESSED = 0x4
+ARCHIVE_EMBED_FILE_NAMES = 0x100
+
+# Бит в размере файла, инвертирующий флаг сжатия архива для этого файла
+FILE_COMPRESSION_TOGGLE = 0x40000000
+FILE_SIZE_MASK = 0x3FFFFFFF
+
+STRINGS_EXTENSIONS = (".strings", ".dlstrings", ".ilstrings")
+
+
+class BSAEntry:
+    """Файл внутри архива BSA.
+
+    Хранит только положение данных в архиве; содержимое читается
+    и распаковывается в память по запросу через read().
+    """
+
+    def __init__(
+        self,
+        archive: "BSAArchive",
+        folder: str,
+        name: str,
+        offset: int,
+        size: int,
+        compressed: bool,
+    ):
+        self.archive = archive
+        self.folder = folder
+        self.name = name
+        self.offset = offset
+        self.size = size
+        self.compressed = compressed
+
+    @property
+    def path(self) -> str:
+        return f"{self.folder}\\{self.name}"
+
+    def read(self) -> bytes:
+        return self.archive.read_entry(self)
+
+    def __repr__(self):
+        return f"BSAEntry({self.archive.path.name}:{self.path})"
+
+
+class BSAArchive:
+    """Читатель архивов Bethesda BSA (v103/v104 - zlib, v105 - LZ4).
+
+    При открытии читается только каталог архива (заголовок, записи
+    папок и файлов, блок имен); данные файлов читаются по одному
+    через read_entry() без распаковки архива на диск.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.logger = logging.getLogger(__name__)
+        self.entries: List[BSAEntry] = []
+        self._read_directory()
+
+    def _read_directory(self):
+        with open(self.path, "rb") as f:
+            header = f.read(36)
+            if len(header) < 36 or header[:4] != BSA_MAGIC:
+                raise ValueError(f"Not a BSA archive: {self.path}")
+            (
+                self.version,
+                folder_records_offset,
+                self.flags,
+                folder_count,
+                file_count,
+                _total_folder_name_length,
+                total_file_name_length,
+            ) = struct.unpack_from("<7I", header, 4)
+            if self.version not in (103, 104, 105):
+                raise ValueError(f"Unsupported BSA version {self.version}")
+            if not (
+                self.flags & ARCHIVE_DIRECTORY_NAMES and self.flags & ARCHIVE_FILE_NAMES
+            ):
+                raise ValueError(f"Archive {self.path} has no file names")
+
+            # Записи папок: hash, число файлов, смещение блока папки
+            record_size = 24 if self.version == 105 else 16
+            f.seek(folder_records_offset)
+            records = f.read(folder_count * record_size)
+            file_counts = [
+                struct.unpack_from("<I", records, i * record_size + 8)[0]
+                for i in range(folder_count)
+            ]
+
+            # Блоки папок: имя папки (bstring с нулем) и записи ее файлов
+            folders = []
+            for count in file_counts:
+                name_length = f.read(1)[0]
+                folder_name = f.read(name_length)[:-1].decode("cp1252")
+                file_records = f.read(count * 16)
+                folders.append(
+                    (
+                        folder_name,
+                        [
+                            struct.unpack_from("<QII", file_records, i * 16)[1:]
+                            for i in range(count)
+                        ],
+                    )
+                )
+
+            # Блок имен файлов в порядке записей файлов
+            names = f.read(total_file_name_length).split(b"\x00")
+            if len(names) < file_count:
+                raise ValueError(f"Truncated file name block in {self.path}")
+
+        archive_compressed = bool(self.flags & ARCHIVE_COMPRESSED)
+        index = 0
+        for folder_name, file_records in folders:
+            for size, offset in file_records:
+                self.entries.append(
+                    BSAEntry(
+                        self,
+                        folder_name,
+                        names[index].decode("cp1252"),
+                        offset,
+                        size & FILE_SIZE_MASK,
+                        archive_compressed != bool(size & FILE_COMPRESSION_TOGGLE),
+                    )
+                )
+                index += 1
+
+    def find(self, folder: str, extensions: tuple = ()) -> List[BSAEntry]:
+        """Файлы из папки folder (без учета регистра) с указанными расширениями"""
+        folder = folder.lower().replace("/", "\\")
+        return [
+            entry
+            for entry in self.entries
+            if entry.folder.lower() == folder
+            and (not extensions or entry.name.lower().endswith(extensions))
+        ]
+
+    def read_entry(self, entry: BSAEntry) -> bytes:
+        """Читает и распаковывает один файл архива"""
+        with open(self.path, "rb") as f:
+            f.seek(entry.offset)
+            data = f.read(entry.size)
+
+        if self.version >= 104 and self.flags & ARCHIVE_EMBED_FILE_NAMES:
+            # Перед данными записан полный путь файла (bstring без нуля)
+            data = data[1 + data[0] :]
+
+        if not entry.compressed:
+            return data
+
+        original_size = struct.unpack_from("<I", data)[0]
+        if self.version == 105:
+            if lz4 is None:
+                raise RuntimeError(
+                    f"{entry} is LZ4-compressed; install the lz4 package to read it"
+                )
+            return lz4.frame.decompress(data[4:])
+        return zlib.decompress(data[4:], bufsize=original_size)
+
+
+def find_archive_strings(directory: str) -> Dict[str, BSAEntry]:
+    """Находит строковые таблицы во всех архивах .bsa каталога.
+
+    Returns:
+        {имя файла в нижнем регистре: запись архива}. Если файл есть
+        в нескольких архивах, берется архив, идущий позже по имени
+    """
+    logger = logging.getLogger(__name__)
+    entries: Dict[str, BSAEntry] = {}
+    for archive_path in sorted(Path(directory).glob("*.[bB][sS][aA]")):
+        try:
+            archive = BSAArchive(str(archive_path))
+        except (OSError, ValueError, struct.error) as e:
+            logger.error(f"Failed to read archive {archive_path.name}: {e}")
+            continue
+        for entry in archive.find("strings", STRINGS_EXTENSIONS):
+            entries[entry.name.lower()] = entry
+    return entries
@@ -1,10 +1,17 @@
 import enum
 import os
 import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, List, Tuple, Union
+from core.bsa import BSAEntry, find_archive_strings
 from core.logger import setup_logging
 from db.handler import DBHandler
+from db.sharded import create_db_handler
+
+# Loose file path or string table stored inside a BSA archive
+StringSource = Union[str, BSAEntry]
 
 
 class StringContainerType(enum.IntEnum):
@@ -25,9 +32,18 @@ class SkyrimStringParser:
     def parse_strings_file(self, file_path: str) -> Dict[int, str]:
         """Parse single .strings/.dlstrings/.ilstrings file"""
         path = Path(file_path)
+        return self.parse_strings_data(path.read_bytes(), path.suffix)
+
+    def parse_strings_source(self, source: StringSource) -> Dict[int, str]:
+        """Parse a loose strings file or a strings entry inside a BSA archive"""
+        if isinstance(source, BSAEntry):
+            return self.parse_strings_data(source.read(), Path(source.name).suffix)
+        return self.parse_strings_file(source)
 
+    def parse_strings_data(self, data: bytes, extension: str) -> Dict[int, str]:
+        """Parse contents of a .strings/.dlstrings/.ilstrings file held in memory"""
         try:
-            ext = path.suffix.lower()
+            ext = extension.lower()
             if ext == ".strings":
                 type_ = StringContainerType.Strings
             elif ext == ".dlstrings":
@@ -37,50 +53,46 @@ class SkyrimStringParser:
             else:
                 raise ValueError(f"Unsupported file extension: {ext}")
 
-            with open(file_path, "rb") as f:
-                count = int.from_bytes(f.read(4), byteorder="little")
-                size = int.from_bytes(f.read(4), byteorder="little")
-
-                directory = []
-                for _ in range(count):
-                    string_id = int.from_bytes(f.read(4), byteorder="little")
-                    offset = int.from_bytes(f.read(4), byteorder="little")
-                    directory.append((string_id, offset))
-
-                strings = {}
-                for string_id, offset in directory:
-                    f.seek(8 + (count * 8) + offset)
-
-                    if type_ == StringContainerType.Strings:
-                        chars = []
-                        while True:
-                            char = f.read(1)
-                            if char == b"\x00":
-                                break
-                            chars.append(char)
-                        string_bytes = b"".join(chars)
-                    else:
-                        str_size = int.from_bytes(f.read(4), byteorder="little")
-                        string_bytes = f.read(str_size)
-
-                    try:
-                        string_text = string_bytes.decode("utf-8")
-                    except UnicodeDecodeError:
-                        string_text = string_bytes.decode("cp1252")
-                    strings[string_id] = self._clean_string(string_text)
-
-                return strings
+            count = int.from_bytes(data[0:4], byteorder="little")
+            size = int.from_bytes(data[4:8], byteorder="little")
+            data_start = 8 + count * 8
+            if len(data) < data_start + size:
+                raise ValueError("Strings file is truncated")
+
+            strings = {}
+            for i in range(count):
+                entry = 8 + i * 8
+                string_id = int.from_bytes(data[entry : entry + 4], byteorder="little")
+                offset = data_start + int.from_bytes(
+                    data[entry + 4 : entry + 8], byteorder="little"
+                )
+
+                if type_ == StringContainerType.Strings:
+                    string_bytes = data[offset : data.index(b"\x00", offset)]
+                else:
+                    str_size = int.from_bytes(
+                        data[offset : offset + 4], byteorder="little"
+                    )
+                    string_bytes = data[offset + 4 : offset + 4 + str_size]
+
+                try:
+                    string_text = string_bytes.decode("utf-8")
+                except UnicodeDecodeError:
+                    string_text = string_bytes.decode("cp1252")
+                strings[string_id] = self._clean_string(string_text)
+
+            return strings
 
         except Exception as e:
             self.logger.error(f"Error parsing strings file: {str(e)}")
             raise
 
     def parse_language_pair(
-        self, eng_file: str, rus_file: str
+        self, eng_file: StringSource, rus_file: StringSource
     ) -> Dict[int, Tuple[str, str]]:
         """Parse pair of english/russian files"""
-        eng_strings = self.parse_strings_file(eng_file)
-        rus_strings = self.parse_strings_file(rus_file)
+        eng_strings = self.parse_strings_source(eng_file)
+        rus_strings = self.parse_strings_source(rus_file)
 
         combined = {}
         for string_id, eng_text in eng_strings.items():
@@ -97,13 +109,18 @@ class SkyrimStringParser:
         return filename.split("_")[0]
 
 
-def find_language_pairs(directory: str) -> List[Tuple[str, str]]:
-    """Find matching english/russian file pairs in directory"""
+def find_language_pairs(directory: str) -> List[Tuple[StringSource, StringSource]]:
+    """Find matching english/russian file pairs in directory.
+
+    Loose files are paired first. String tables inside the directory's
+    .bsa archives are paired next, unless a loose file with the same name
+    exists (loose files override archives, as in the game).
+    """
     files = os.listdir(directory)
     eng_files = [f for f in files if "_english." in f]
     rus_files = [f for f in files if "_russian." in f]
 
-    pairs = []
+    pairs: List[Tuple[StringSource, StringSource]] = []
     for eng_file in eng_files:
         parts = eng_file.split("_english.")
         if len(parts) != 2:
@@ -116,23 +133,71 @@ def find_language_pairs(directory: str) -> List[Tuple[str, str]]:
                 (os.path.join(directory, eng_file), os.path.join(directory, rus_file))
             )
 
+    loose_files = {f.lower(): os.path.join(directory, f) for f in files}
+    archived = {
+        name: entry
+        for name, entry in find_archive_strings(directory).items()
+        if name not in loose_files
+    }
+    sources: Dict[str, StringSource] = {**loose_files, **archived}
+    for name in sorted(archived):
+        base_name, sep, extension = name.partition("_english.")
+        if not sep:
+            base_name, sep, extension = name.partition("_russian.")
+            # Pair with a loose english file; archive-only pairs come from english
+            eng_name = f"{base_name}_english.{extension}"
+            if sep and eng_name in loose_files:
+                pairs.append((loose_files[eng_name], archived[name]))
+            continue
+        rus_name = f"{base_name}_russian.{extension}"
+        if rus_name in sources:
+            pairs.append((archived[name], sources[rus_name]))
+
     return pairs
 
 
-def save_to_db(db_handler, plugin_name: str, strings: Dict[int, Tuple[str, str]]):
+def source_name(source: StringSource) -> str:
+    """File name of a loose file or archive entry"""
+    return source.name if isinstance(source, BSAEntry) else Path(source).name
+
+
+def pair_display_name(eng_file: StringSource, rus_file: StringSource) -> str:
+    """File name that gives the stored plugin name of a pair.
+
+    Pairs are matched case-insensitively, but archives usually store
+    lowercase names, so the loose file's spelling is preferred.
+    """
+    if isinstance(eng_file, BSAEntry) and not isinstance(rus_file, BSAEntry):
+        return source_name(rus_file)
+    return source_name(eng_file)
+
+
+def save_to_db(
+    db_handler,
+    plugin_name: str,
+    strings: Dict[int, Tuple[str, str]],
+    strict: bool = False,
+):
     """Save parsed strings to database"""
     logger = logging.getLogger(__name__)
     try:
         return db_handler.save_translations(plugin_name, strings)
     except Exception as e:
         logger.error(f"Failed to save translations: {e}")
+        if strict:
+            raise
         return 0
 
 
 def parse_all_files(
-    directory: str, db_handler: DBHandler
+    directory: str, db_handler: DBHandler, strict: bool = False
 ) -> Dict[str, Dict[int, Tuple[str, str]]]:
-    """Parse all language pairs in directory and save to DB"""
+    """Parse all language pairs in directory and save to DB.
+
+    By default a pair that fails to parse or save is logged and skipped.
+    With strict=True the first failure is raised instead, so that a
+    rebuild never produces a database with plugins missing.
+    """
     setup_logging()
     logger = logging.getLogger(__name__)
     parser = SkyrimStringParser()
@@ -149,15 +214,17 @@ def parse_all_files(
 
     for eng_path, rus_path in pairs:
         try:
-            plugin_name = parser.get_plugin_name(Path(eng_path).name)
+            plugin_name = parser.get_plugin_name(pair_display_name(eng_path, rus_path))
             strings = parser.parse_language_pair(eng_path, rus_path)
-            saved = save_to_db(db_handler, plugin_name, strings)
+            saved = save_to_db(db_handler, plugin_name, strings, strict)
             results[plugin_name] = strings
             total_saved += saved
             total_files += 1
             total_strings += len(strings)
         except Exception as e:
             logger.error(f"Failed to process file pair: {e}")
+            if strict:
+                raise
             continue
 
     logger.info(f"Processed {total_files} file pairs, {total_strings} strings total")
@@ -165,11 +232,46 @@ def parse_all_files(
     return results
 
 
+def _build_shadow(directory: str, handler_class: type, db_path: str) -> Tuple[str, int]:
+    """Load all language pairs into a fresh shadow copy of db_path"""
+    shadow = handler_class(db_path).create_shadow()
+    try:
+        results = parse_all_files(directory, shadow, strict=True)
+        shadow.seal()
+    except Exception:
+        shadow.discard()
+        raise
+    return str(shadow.db_path), len(results)
+
+
+def rebuild_database(directory: str, db_handler: DBHandler) -> int:
+    """Rebuild the database in a shadow file and atomically swap it in.
+
+    Parsing runs in a separate process so that it does not compete with
+    searches for the GIL; searches through db_handler keep seeing the old
+    data until the new database has been fully loaded and validated.
+    The process is spawned rather than forked: the caller runs next to
+    search threads, and a forked child could inherit a lock one of them holds.
+    If any file pair fails to load, the rebuild fails and the live
+    database is left as it is.
+    """
+    logger = logging.getLogger(__name__)
+    logger.info(f"Rebuilding database {db_handler.db_path} from {directory}")
+    with ProcessPoolExecutor(
+        max_workers=1, mp_context=multiprocessing.get_context("spawn")
+    ) as pool:
+        shadow_path, plugins = pool.submit(
+            _build_shadow, directory, type(db_handler), str(db_handler.db_path)
+        ).result()
+    db_handler.swap_in(Path(shadow_path))
+    return plugins
+
+
 if __name__ == "__main__":
     data_dir = "skyrim_strings"
     if not os.path.exists(data_dir):
         raise FileNotFoundError(f"Directory {data_dir} not found")
 
-    with DBHandler() as db_handler:
+    with create_db_handler() as db_handler:
         all_strings = parse_all_files(data_dir, db_handler)
         print(f"Successfully processed {len(all_strings)} mods")
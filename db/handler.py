@@ -1,6 +1,10 @@
+import os
 import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Tuple
 
 
 class DBHandler:
@@ -26,7 +30,15 @@ class DBHandler:
         """
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
-        self._conn = None
+        self._conn: Optional[sqlite3.Connection] = None
+        # Учет запросов, выполняющихся на каждом соединении (id -> число),
+        # чтобы закрывать старое соединение только после их завершения
+        self._leases: Dict[int, int] = {}
+        self._swap_cond = threading.Condition()
+        self._paused = False
+        # Поколение данных в памяти и отметка файлов, при которой оно прочитано
+        self._generation: Optional[str] = None
+        self._generation_stamp: Tuple = ()
         from core.logger import get_logger
 
         self.logger = get_logger(__name__)
@@ -50,26 +62,155 @@ class DBHandler:
         pass
 
     def connect(self):
-        self._conn = sqlite3.connect(self.db_path)
+        self._conn = self._open_connection(self.db_path)
+        self._create_tables()
+
+    def _open_connection(self, path: Path, wal: bool = True) -> sqlite3.Connection:
+        """Открывает соединение с настройками проекта.
+
+        Соединение может использоваться из разных потоков: фоновая
+        пересборка базы закрывает старое соединение не в том потоке,
+        в котором оно было открыто.
+        """
+        conn = sqlite3.connect(path, check_same_thread=False)
         # Устанавливаем параметры для уменьшения блокировок
-        self._conn.execute("PRAGMA encoding = 'UTF-8'")
-        self._conn.execute("PRAGMA journal_mode = WAL")  # Режим записи журнала
-        self._conn.execute(
+        conn.execute("PRAGMA encoding = 'UTF-8'")
+        if wal:
+            conn.execute("PRAGMA journal_mode = WAL")  # Режим записи журнала
+        conn.execute(
             "PRAGMA synchronous = NORMAL"
         )  # Баланс между надежностью и скоростью
-        self._conn.execute(
+        conn.execute(
             "PRAGMA busy_timeout = 5000"
         )  # Таймаут ожидания блокировки 5 секунд
-        self._create_tables()
+        self._register_unicode_functions(conn)
+        return conn
+
+    def database_files(self) -> List[Path]:
+        """Файлы SQLite, в которых хранятся переводы"""
+        return [self.db_path]
 
     def close(self):
-        if self.conn:
-            self.conn.close()
+        if self._conn:
+            self._conn.close()
+            self._conn = None
+
+    @contextmanager
+    def _lease(self):
+        """Выдает текущее соединение на время одного запроса.
+
+        Пока соединение выдано, подмена базы (swap_in) не закроет его.
+        """
+        with self._swap_cond:
+            self._swap_cond.wait_for(lambda: not self._paused)
+            conn = self.conn
+            self._leases[id(conn)] = self._leases.get(id(conn), 0) + 1
+        try:
+            yield conn
+        finally:
+            with self._swap_cond:
+                self._leases[id(conn)] -= 1
+                if not self._leases[id(conn)]:
+                    del self._leases[id(conn)]
+                self._swap_cond.notify_all()
+
+    @property
+    def shadow_path(self) -> Path:
+        """Путь к теневой базе, в которую идет пересборка"""
+        return self.db_path.with_name(self.db_path.name + ".shadow")
+
+    @staticmethod
+    def _remove_database_files(path: Path):
+        """Удаляет файл базы вместе с файлами журналов"""
+        for suffix in ("", "-wal", "-shm", "-journal"):
+            Path(f"{path}{suffix}").unlink(missing_ok=True)
+
+    def create_shadow(self) -> "DBHandler":
+        """Создает пустую теневую базу рядом с рабочей.
+
+        Загрузка в теневую базу не блокирует рабочую, а поиск продолжает
+        работать со старыми данными до вызова swap_in(). После загрузки
+        теневую базу нужно закрыть через seal().
+        """
+        self._remove_database_files(self.shadow_path)
+        shadow = DBHandler(str(self.shadow_path))
+        # Теневая база одноразовая: при сбое ее просто пересобирают
+        shadow.conn.execute("PRAGMA synchronous = OFF")
+        return shadow
+
+    def _validate_database(self, path: Path):
+        """Проверяет, что база пригодна для подмены рабочей"""
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            table_exists = conn.execute(
+                "SELECT name FROM sqlite_master WHERE type='table' AND name='translations'"
+            ).fetchone()
+            if not table_exists:
+                raise RuntimeError(f"Translations table not found in {path}")
+            count = conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+            if count == 0:
+                raise RuntimeError(f"Shadow database {path} is empty")
+            integrity = conn.execute("PRAGMA quick_check").fetchone()[0]
+            if integrity != "ok":
+                raise RuntimeError(f"Shadow database check failed: {integrity}")
+            self.logger.info(f"Shadow database validated: {count} records")
+        finally:
+            conn.close()
+
+    def discard(self):
+        """Закрывает и удаляет теневую базу после неудачной загрузки"""
+        self.close()
+        self._remove_database_files(self.db_path)
+
+    def seal(self):
+        """Сводит базу в один файл без WAL и закрывает соединение"""
+        self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        self.conn.execute("PRAGMA journal_mode = DELETE")
+        self.close()
+
+    def swap_in(self, shadow_path: Path):
+        """Атомарно заменяет рабочую базу теневой.
+
+        Порядок действий:
+        1. Теневая база (уже закрытая через seal()) проверяется
+        2. Новые запросы ждут, пока выполняющиеся на старом соединении
+           не завершатся; затем старое соединение закрывается
+        3. Теневой файл переименовывается в рабочий (os.replace)
+        4. Открывается соединение с новым файлом, запросы продолжаются
+
+        Во время переименования ни один файл базы не открыт (в Windows
+        открытый SQLite файл нельзя переименовать или заменить). Поиск
+        обслуживается либо старыми, либо новыми данными целиком.
+        """
+        try:
+            self._validate_database(shadow_path)
+        except Exception:
+            # Непригодная теневая база не нужна: рабочая остается как есть
+            self._remove_database_files(shadow_path)
+            raise
+
+        with self._swap_cond:
+            self._paused = True
+            try:
+                self._swap_cond.wait_for(lambda: not self._leases)
+                self._generation = None
+                self.close()
+                # WAL-файлы старой базы не должны достаться новому файлу
+                for suffix in ("-wal", "-shm"):
+                    Path(f"{self.db_path}{suffix}").unlink(missing_ok=True)
+                os.replace(shadow_path, self.db_path)
+                self._conn = self._open_connection(self.db_path)
+                # Пока запросы приостановлены, соединение больше никто не использует
+                self._load_generation(self._conn)
+            finally:
+                self._paused = False
+                self._swap_cond.notify_all()
+        self.logger.info(f"Database swapped in from {shadow_path}")
 
     def _create_tables(self):
         try:
             # Создаем основную таблицу translations
-            self._conn.execute(
+            self.conn.execute(
                 """
                 CREATE TABLE IF NOT EXISTS translations (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -98,6 +239,15 @@ class DBHandler:
                 ON translations (translated_string)
             """
             )
+            # Служебная таблица: поколение данных для инвалидации кэшей
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                )
+            """
+            )
         except sqlite3.OperationalError as e:
             if "locked" in str(e):
                 self.logger.warning("Database is locked, retrying...")
@@ -149,6 +299,8 @@ class DBHandler:
                     "SELECT COUNT(*) FROM translations"
                 ).fetchone()[0]
                 added = new_count - existing_count
+                if added:
+                    self._bump_generation()
                 self.logger.info(f"Added {added} new records")
                 return added
 
@@ -187,10 +339,67 @@ class DBHandler:
             self.logger.error(f"Database error in translation_exists: {e}")
             return False
 
+    def count_translations(self) -> int:
+        """Возвращает число строк в таблице translations"""
+        with self._lease() as conn:
+            return conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+
     def clear_database(self):
         """Очищает таблицу translations"""
         with self.conn:
             self.conn.execute("DELETE FROM translations")
+            self._bump_generation()
+
+    @property
+    def generation(self) -> str:
+        """Идентификатор текущего поколения данных.
+
+        Меняется при каждой загрузке или очистке переводов, поэтому
+        подходит как ключ для кэшей, зависящих от содержимого базы.
+        Значение хранится в памяти и перечитывается из таблицы meta только
+        после записи через этот обработчик, подмены базы или изменения
+        файлов базы (запись из других процессов и соединений), поэтому
+        обращение к нему не выполняет запросов SQLite.
+        """
+        generation = self._generation
+        if generation is None or self._file_stamp() != self._generation_stamp:
+            generation = self._read_generation()
+        return generation
+
+    def _file_stamp(self) -> Tuple:
+        """Время изменения и размер файла базы и журнала WAL.
+
+        Любая зафиксированная запись меняет один из них: в режиме WAL
+        транзакции дописываются в журнал, контрольная точка пишет в файл базы
+        """
+        stamp: List[Optional[Tuple[int, int, int]]] = []
+        for suffix in ("", "-wal"):
+            try:
+                stat = os.stat(f"{self.db_path}{suffix}")
+                stamp.append((stat.st_ino, stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                stamp.append(None)
+        return tuple(stamp)
+
+    def _read_generation(self) -> str:
+        with self._lease() as conn:
+            return self._load_generation(conn)
+
+    def _load_generation(self, conn: sqlite3.Connection) -> str:
+        stamp = self._file_stamp()
+        row = conn.execute("SELECT value FROM meta WHERE key = 'generation'").fetchone()
+        self._generation = row[0] if row else ""
+        self._generation_stamp = stamp
+        return self._generation
+
+    def _bump_generation(self):
+        """Записывает новое поколение данных (вызывается внутри транзакции)"""
+        self.conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('generation', ?)",
+            (uuid.uuid4().hex,),
+        )
+        # Новое значение читается после фиксации транзакции
+        self._generation = None
 
     def is_database_empty(self) -> bool:
         """Проверяет, пустая ли база данных"""
@@ -207,7 +416,7 @@ class DBHandler:
             return ""
         return unicodedata.normalize("NFKC", s).casefold()
 
-    def _register_unicode_functions(self):
+    def _register_unicode_functions(self, conn: sqlite3.Connection):
         """Регистрирует функции для работы с Unicode в SQLite"""
         import unicodedata
 
@@ -227,8 +436,8 @@ class DBHandler:
                 return ""
             return unicodedata.normalize("NFKC", s).casefold()
 
-        self.conn.create_function("unicode_compare", 2, normalize_compare)
-        self.conn.create_function("unicode_search", 1, normalize_search)
+        conn.create_function("unicode_compare", 2, normalize_compare)
+        conn.create_function("unicode_search", 1, normalize_search)
 
     def search_translations(
         self,
@@ -238,15 +447,12 @@ class DBHandler:
         case_insensitive: bool = True,
         offset: int = 0,
         limit: int = 20,
+        plugin_name: Optional[str] = None,
     ) -> Tuple[List[Dict], int, int]:
         """
-        Ищет переводы по запросу в базе данных с поддержкой Unicode
+        Ищет переводы по запросу в базе данных с поддержкой Unicode.
+        Если указан plugin_name, поиск ограничивается строками этого плагина
         """
-        if not hasattr(self, "conn") or self.conn is None:
-            self.connect()
-
-        self._register_unicode_functions()
-
         conditions = []
         params = []
 
@@ -272,6 +478,9 @@ class DBHandler:
             return []
 
         where_clause = " OR ".join(conditions)
+        if plugin_name:
+            where_clause = f"({where_clause}) AND plugin_name = ? COLLATE NOCASE"
+            params.append(plugin_name)
 
         query = f"""
             SELECT plugin_name, original_string, translated_string,
@@ -295,20 +504,21 @@ class DBHandler:
         params.append(limit)
         params.append(offset)
 
-        # Получаем результаты поиска
-        cursor = self.conn.execute(query, params)
-        columns = [column[0] for column in cursor.description]
-        results = [dict(zip(columns, row)) for row in cursor.fetchall()]
-
-        # Получаем общее количество совпадений
-        count_query = f"SELECT COUNT(*) FROM translations WHERE {where_clause}"
-        # Используем только параметры поиска, без параметров пагинации и match_priority
-        count_params = params[2:-2] if len(params) > 4 else params[2:]
-        total_matches = self.conn.execute(count_query, count_params).fetchone()[0]
-
-        # Получаем общее количество строк в базе
-        total_in_db = self.conn.execute("SELECT COUNT(*) FROM translations").fetchone()[
-            0
-        ]
+        with self._lease() as conn:
+            # Получаем результаты поиска
+            cursor = conn.execute(query, params)
+            columns = [column[0] for column in cursor.description]
+            results = [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+            # Получаем общее количество совпадений
+            count_query = f"SELECT COUNT(*) FROM translations WHERE {where_clause}"
+            # Используем только параметры поиска, без параметров пагинации и match_priority
+            count_params = params[2:-2] if len(params) > 4 else params[2:]
+            total_matches = conn.execute(count_query, count_params).fetchone()[0]
+
+            # Получаем общее количество строк в базе
+            total_in_db = conn.execute("SELECT COUNT(*) FROM translations").fetchone()[
+                0
+            ]
 
         return results, total_matches, total_in_db
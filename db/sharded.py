@@ -0,0 +1,383 @@
+import hashlib
+import heapq
+import multiprocessing
+import os
+import re
+import shutil
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from db.handler import DBHandler
+
+# Обработчики шардов внутри процессов пула (путь к файлу -> DBHandler)
+_worker_handlers: Dict[str, DBHandler] = {}
+
+
+def _search_handler(
+    handler: DBHandler,
+    search_query: str,
+    search_in_original: bool,
+    search_in_translated: bool,
+    case_insensitive: bool,
+    limit: int,
+) -> Tuple[List[Dict], int, int]:
+    """Первые limit строк одного шарда в порядке ранжирования"""
+    return handler.search_translations(
+        search_query,
+        search_in_original=search_in_original,
+        search_in_translated=search_in_translated,
+        case_insensitive=case_insensitive,
+        offset=0,
+        limit=limit,
+    )
+
+
+def _search_shard(shard_path: str, *args) -> Tuple[List[Dict], int, int]:
+    """Поиск в одном шарде (выполняется в процессе пула).
+
+    Процесс пула выполняет одну задачу за раз, поэтому соединения
+    прежних поколений можно закрывать без учета выдачи.
+    """
+    handler = _worker_handlers.get(shard_path)
+    if handler is None:
+        # Шарды прежних поколений больше не понадобятся
+        current_dir = str(Path(shard_path).parent)
+        for path in [p for p in _worker_handlers if str(Path(p).parent) != current_dir]:
+            _worker_handlers.pop(path).close()
+        handler = _worker_handlers[shard_path] = DBHandler(shard_path)
+    return _search_handler(handler, *args)
+
+
+def _rank_key(row: Dict) -> Tuple[int, int, int]:
+    """Ключ сортировки, совпадающий с ORDER BY в DBHandler.search_translations"""
+    return (
+        row["match_priority"],
+        row["original_length"],
+        0 if row["translated_string"] is not None else 1,
+    )
+
+
+class ShardedDBHandler:
+    """Хранилище переводов, разбитое на файлы SQLite по плагинам.
+
+    Каждый плагин хранится в отдельном шарде - обычной базе DBHandler.
+    Поиск по одному плагину затрагивает только его шард, поиск без
+    фильтра выполняется параллельно по всем шардам в пуле процессов,
+    а результаты сливаются с сохранением ранжирования.
+
+    Структура каталога:
+        database/shards/CURRENT        - имя активного поколения
+        database/shards/<поколение>/   - файлы шардов <плагин>.db
+
+    Атрибуты:
+        db_path (Path): Корневой каталог шардов
+        shard_dir (Path): Каталог активного поколения
+        workers (int): Число процессов для параллельного поиска
+    """
+
+    def __init__(
+        self,
+        db_path: str = "database/shards",
+        pinned: bool = False,
+        workers: Optional[int] = None,
+    ):
+        """Инициализация шардированного хранилища.
+
+        Args:
+            db_path (str): Корневой каталог шардов
+            pinned (bool): Использовать db_path как каталог шардов напрямую,
+                без файла CURRENT (так открывается теневое поколение)
+            workers (int): Число процессов для поиска. По умолчанию - число ядер
+        """
+        self.db_path = Path(db_path)
+        self.db_path.mkdir(parents=True, exist_ok=True)
+        self.pinned = pinned
+        self.workers = workers or os.cpu_count() or 1
+        self.shard_dir = self.db_path if pinned else self._current_dir()
+        self._shards: Dict[str, DBHandler] = self._open_shards(self.shard_dir)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        # Число строк в каждом шарде: имя -> (поколение шарда, число)
+        self._totals: Dict[str, Tuple[str, int]] = {}
+        # mtime каталога поколения при последнем поиске новых шардов
+        self._dir_stamp: Optional[int] = None
+        # Число выполняющихся поисков по каждому поколению
+        self._leases: Dict[Path, int] = {}
+        self._swap_cond = threading.Condition()
+        from core.logger import get_logger
+
+        self.logger = get_logger(__name__)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+    def _current_dir(self) -> Path:
+        """Каталог активного поколения (создается при первом запуске)"""
+        current_file = self.db_path / "CURRENT"
+        if current_file.exists():
+            return self.db_path / current_file.read_text(encoding="utf-8").strip()
+        shard_dir = self.db_path / uuid.uuid4().hex
+        shard_dir.mkdir()
+        self._write_current(shard_dir)
+        return shard_dir
+
+    def _write_current(self, shard_dir: Path):
+        """Атомарно переключает CURRENT на shard_dir"""
+        tmp_file = self.db_path / "CURRENT.tmp"
+        tmp_file.write_text(shard_dir.name, encoding="utf-8")
+        os.replace(tmp_file, self.db_path / "CURRENT")
+
+    @staticmethod
+    def _open_shards(shard_dir: Path) -> Dict[str, DBHandler]:
+        return {path.stem: DBHandler(str(path)) for path in shard_dir.glob("*.db")}
+
+    @staticmethod
+    def shard_name(plugin_name: str) -> str:
+        """Имя шарда для плагина (имена плагинов Skyrim регистронезависимы)"""
+        return re.sub(r"[^\w.-]", "_", plugin_name.lower())
+
+    def _shard(self, plugin_name: str) -> Optional[DBHandler]:
+        return self._shards.get(self.shard_name(plugin_name))
+
+    def _shard_for_write(self, plugin_name: str) -> DBHandler:
+        """Шард плагина; создается, если его еще нет"""
+        name = self.shard_name(plugin_name)
+        shard = self._shards.get(name)
+        if shard is None:
+            shard = self._shards[name] = DBHandler(str(self.shard_dir / f"{name}.db"))
+        return shard
+
+    def database_files(self) -> List[Path]:
+        """Файлы SQLite, в которых хранятся переводы"""
+        return [shard.db_path for shard in self._shards.values()]
+
+    def close(self):
+        for shard in self._shards.values():
+            shard.close()
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def _refresh_shards(self):
+        """Открывает новые файлы шардов (вызывается под self._swap_cond).
+
+        Каталог перечитывается только при изменении его mtime, которое
+        меняется при создании файлов в нем
+        """
+        dir_stamp = self.shard_dir.stat().st_mtime_ns
+        if dir_stamp == self._dir_stamp:
+            return
+        for path in self.shard_dir.glob("*.db"):
+            if path.stem not in self._shards:
+                self._shards[path.stem] = DBHandler(str(path))
+        self._dir_stamp = dir_stamp
+
+    @contextmanager
+    def _lease(self, with_pool: bool = False):
+        """Выдает снимок текущего поколения шардов и пул процессов
+        на время одного поиска.
+
+        Шарды, созданные в каталоге поколения другим процессом
+        (например, парсером), подхватываются, если каталог изменился.
+        Пул создается только при with_pool=True. Процессы пула
+        запускаются через spawn: пул создается из потока сервера, а fork
+        при работающих потоках может унаследовать захваченную блокировку.
+        """
+        with self._swap_cond:
+            self._refresh_shards()
+            if with_pool and self._pool is None and self.workers > 1:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            shard_dir, shards, pool = self.shard_dir, dict(self._shards), self._pool
+            self._leases[shard_dir] = self._leases.get(shard_dir, 0) + 1
+        try:
+            yield shards, pool
+        finally:
+            with self._swap_cond:
+                self._leases[shard_dir] -= 1
+                if not self._leases[shard_dir]:
+                    del self._leases[shard_dir]
+                self._swap_cond.notify_all()
+
+    @property
+    def generation(self) -> str:
+        """Идентификатор поколения данных, общий для всех шардов.
+
+        Складывается из поколений шардов, которые DBHandler хранит в памяти,
+        поэтому обращение к нему не выполняет запросов SQLite и не создает
+        пул процессов.
+        """
+        with self._lease() as (shards, _):
+            digest = hashlib.blake2b(digest_size=16)
+            for name in sorted(shards):
+                digest.update(f"{name}:{shards[name].generation};".encode())
+        return digest.hexdigest()
+
+    def save_translations(self, plugin_name: str, strings: Dict[int, Tuple[str, str]]):
+        """Сохраняет строки перевода в шард плагина"""
+        return self._shard_for_write(plugin_name).save_translations(
+            plugin_name, strings
+        )
+
+    def get_translations(self, plugin_name: str) -> List[Dict]:
+        shard = self._shard(plugin_name)
+        return shard.get_translations(plugin_name) if shard else []
+
+    def translation_exists(self) -> bool:
+        return any(shard.translation_exists() for shard in self._shards.values())
+
+    def is_database_empty(self) -> bool:
+        return all(shard.is_database_empty() for shard in self._shards.values())
+
+    def clear_database(self):
+        """Очищает все шарды"""
+        for shard in self._shards.values():
+            shard.clear_database()
+
+    def create_shadow(self) -> "ShardedDBHandler":
+        """Создает пустое теневое поколение шардов (см. DBHandler.create_shadow)"""
+        shard_dir = self.db_path / uuid.uuid4().hex
+        shard_dir.mkdir()
+        return ShardedDBHandler(str(shard_dir), pinned=True)
+
+    def seal(self):
+        for shard in self._shards.values():
+            shard.seal()
+
+    def discard(self):
+        """Удаляет теневое поколение после неудачной загрузки"""
+        self.close()
+        if self.pinned:
+            shutil.rmtree(self.db_path, ignore_errors=True)
+
+    def swap_in(self, shadow_path: Path):
+        """Делает теневое поколение активным.
+
+        Шарды нового поколения лежат в отдельном каталоге, поэтому
+        переименовывать файлы не нужно: переключается только CURRENT.
+        Каталог старого поколения удаляется после завершения
+        выполняющихся в нем поисков. Пул процессов пересоздается, чтобы
+        его процессы закрыли соединения со старыми шардами (иначе
+        в Windows каталог не удалить).
+        """
+        shadow_path = Path(shadow_path)
+        shards = self._open_shards(shadow_path)
+        try:
+            if not shards:
+                raise RuntimeError(f"Shadow shard directory {shadow_path} is empty")
+            for shard in shards.values():
+                shard._validate_database(shard.db_path)
+        except Exception:
+            shutil.rmtree(shadow_path, ignore_errors=True)
+            raise
+        # Поколения новых шардов читаются заранее, а не первым запросом
+        for shard in shards.values():
+            shard._read_generation()
+
+        self._write_current(shadow_path)
+        with self._swap_cond:
+            old_dir, old_shards, old_pool = self.shard_dir, self._shards, self._pool
+            self.shard_dir, self._shards, self._pool = shadow_path, shards, None
+            self._totals.clear()
+            self._dir_stamp = None
+            self._swap_cond.wait_for(lambda: old_dir not in self._leases)
+        for shard in old_shards.values():
+            shard.close()
+        if old_pool is not None:
+            old_pool.shutdown()
+        try:
+            shutil.rmtree(old_dir)
+        except OSError as e:
+            self.logger.warning(f"Failed to remove old shard generation {old_dir}: {e}")
+        self.logger.info(f"Shard generation swapped in from {shadow_path}")
+
+    def _total_in_db(self, shards: Dict[str, DBHandler]) -> int:
+        """Число строк во всех шардах.
+
+        Число для шарда пересчитывается только после изменения его
+        поколения (сохранение, очистка, новое поколение шардов)
+        """
+        total = 0
+        for name, shard in shards.items():
+            generation = shard.generation
+            cached = self._totals.get(name)
+            if cached is None or cached[0] != generation:
+                cached = self._totals[name] = (generation, shard.count_translations())
+            total += cached[1]
+        return total
+
+    def search_translations(
+        self,
+        search_query: str,
+        search_in_original: bool = True,
+        search_in_translated: bool = True,
+        case_insensitive: bool = True,
+        offset: int = 0,
+        limit: int = 20,
+        plugin_name: Optional[str] = None,
+    ) -> Tuple[List[Dict], int, int]:
+        """
+        Ищет переводы во всех шардах или только в шарде plugin_name.
+        Каждый шард возвращает первые offset + limit строк в порядке
+        ранжирования, после чего списки сливаются (k-way merge)
+        """
+        with self._lease(with_pool=not plugin_name) as (shards, pool):
+            if plugin_name:
+                # Как и в DBHandler, total - число строк во всем хранилище
+                total_in_db = self._total_in_db(shards)
+                shard = shards.get(self.shard_name(plugin_name))
+                if shard is None:
+                    return [], 0, total_in_db
+                results, total_matches, _ = shard.search_translations(
+                    search_query,
+                    search_in_original=search_in_original,
+                    search_in_translated=search_in_translated,
+                    case_insensitive=case_insensitive,
+                    offset=offset,
+                    limit=limit,
+                    plugin_name=plugin_name,
+                )
+                return results, total_matches, total_in_db
+
+            args = (
+                search_query,
+                search_in_original,
+                search_in_translated,
+                case_insensitive,
+                offset + limit,
+            )
+            if pool is None or len(shards) <= 1:
+                # В процессе сервера ищем через выданные обработчики шардов:
+                # swap_in не закроет их, пока поиск не завершится
+                partials = [_search_handler(s, *args) for s in shards.values()]
+            else:
+                futures = [
+                    pool.submit(_search_shard, str(s.db_path), *args)
+                    for s in shards.values()
+                ]
+                partials = [future.result() for future in futures]
+
+        merged = heapq.merge(*(rows for rows, _, _ in partials), key=_rank_key)
+        results = list(merged)[offset : offset + limit]
+        total_matches = sum(matches for _, matches, _ in partials)
+        total_in_db = sum(total for _, _, total in partials)
+        return results, total_matches, total_in_db
+
+
+def create_db_handler():
+    """Возвращает обработчик хранилища в зависимости от настроек.
+
+    При SHARDED_STORAGE=true переводы хранятся в шардах по плагинам
+    (database/shards), иначе - в одной базе database/translations.db
+    """
+    if os.environ.get("SHARDED_STORAGE") == "true":
+        return ShardedDBHandler()
+    return DBHandler()
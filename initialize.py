@@ -2,6 +2,7 @@ import os
 from core.parser import parse_all_files
 from core.logger import setup_logging
 from db.handler import DBHandler
+from db.sharded import ShardedDBHandler, create_db_handler
 import logging
 
 
@@ -15,7 +16,7 @@ def initialize_application():
     logger = logging.getLogger(__name__)
 
     # Initialize database
-    db_handler = DBHandler()
+    db_handler = create_db_handler()
 
     try:
         # Check if we need to parse files
@@ -24,7 +25,11 @@ def initialize_application():
 
         logger.info(f"Checking database at: {db_path}")
 
-        if not os.path.exists(db_path):
+        if isinstance(db_handler, ShardedDBHandler):
+            # Шардированное хранилище проверяем через обработчик
+            need_parse = not db_handler.translation_exists()
+            logger.info(f"Using sharded storage at: {db_handler.shard_dir}")
+        elif not os.path.exists(db_path):
             need_parse = True
             logger.info("Database file not found, starting initial parsing...")
         else:
@@ -90,6 +95,15 @@ def initialize_application():
             # Парсинг и проверка результата
             parse_all_files(data_dir, db_handler)
 
+            if isinstance(db_handler, ShardedDBHandler):
+                if not db_handler.translation_exists():
+                    logger.error("No records were saved to shards after parsing!")
+                    raise RuntimeError("Failed to save parsed data to database")
+                logger.info(
+                    f"Initial parsing completed. Created {len(db_handler.database_files())} shards"
+                )
+                return
+
             # Проверяем что данные сохранились
             with DBHandler() as db:
                 # Проверяем физическое сохранение файла БД
@@ -0,0 +1,230 @@
+"""Отчёт о согласованности переводов между плагинами.
+
+Находит оригинальные строки, которые в разных плагинах переведены
+по-разному (например, патч переопределяет ванильную терминологию).
+Строки группируются по хэшу нормализованного оригинала за один проход
+по таблице translations; проход разбит на диапазоны id, которые
+обрабатываются параллельно в отдельных процессах.
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import sqlite3
+import threading
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 100_000
+
+# Кэш последнего отчёта: (пути к базам, поколение данных) -> отчёт
+_cache: Dict[Tuple[Tuple[str, ...], str], List[Dict]] = {}
+_cache_lock = threading.Lock()
+
+
+def _normalize(s: str) -> str:
+    """NFKC + casefold + схлопывание пробелов"""
+    if not s:
+        return ""
+    return " ".join(unicodedata.normalize("NFKC", s).casefold().split())
+
+
+def _group_key(normalized: str) -> int:
+    """64-битный ключ группировки по нормализованной строке"""
+    digest = hashlib.blake2b(normalized.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, byteorder="little")
+
+
+def _scan_chunk(db_path: str, first_id: int, last_id: int) -> Dict[int, list]:
+    """Частичная агрегация одного диапазона id.
+
+    Возвращает {ключ оригинала: [оригинал, {ключ перевода: [перевод, число, плагины]}]},
+    где плагины - {имя в нижнем регистре: имя}: имена плагинов регистронезависимы,
+    и Skyrim из отдельных файлов и skyrim из архива - один плагин
+    """
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        rows = conn.execute(
+            """
+            SELECT plugin_name, original_string, translated_string
+            FROM translations
+            WHERE id BETWEEN ? AND ?
+              AND translated_string IS NOT NULL AND translated_string != ''
+            """,
+            (first_id, last_id),
+        )
+        groups: Dict[int, list] = {}
+        for plugin_name, original, translated in rows:
+            key = _group_key(_normalize(original))
+            group = groups.get(key)
+            if group is None:
+                group = groups[key] = [original, {}]
+            variant_key = _normalize(translated)
+            variant = group[1].get(variant_key)
+            if variant is None:
+                group[1][variant_key] = [
+                    translated,
+                    1,
+                    {plugin_name.lower(): plugin_name},
+                ]
+            else:
+                variant[1] += 1
+                variant[2].setdefault(plugin_name.lower(), plugin_name)
+        return groups
+    finally:
+        conn.close()
+
+
+def _plan_chunks(db_path: str, chunk_size: int) -> List[Tuple[str, int, int]]:
+    """Разбивает таблицу на диапазоны id для параллельной обработки"""
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        first, last = conn.execute(
+            "SELECT MIN(id), MAX(id) FROM translations"
+        ).fetchone()
+    finally:
+        conn.close()
+    if first is None:
+        return []
+    return [
+        (db_path, start, min(start + chunk_size - 1, last))
+        for start in range(first, last + 1, chunk_size)
+    ]
+
+
+def _merge(target: Dict[int, list], partial: Dict[int, list]):
+    """Сливает частичный результат одного диапазона в общий"""
+    for key, (original, variants) in partial.items():
+        group = target.get(key)
+        if group is None:
+            target[key] = [original, variants]
+            continue
+        for variant_key, (translated, count, plugins) in variants.items():
+            variant = group[1].get(variant_key)
+            if variant is None:
+                group[1][variant_key] = [translated, count, plugins]
+            else:
+                variant[1] += count
+                for key, plugin_name in plugins.items():
+                    variant[2].setdefault(key, plugin_name)
+
+
+def _resolve_paths(db_paths: Union[str, Path, Sequence]) -> Tuple[str, ...]:
+    """Файл базы, список файлов (шарды) или каталог с файлами *.db"""
+    if isinstance(db_paths, (str, Path)):
+        path = Path(db_paths)
+        db_paths = sorted(path.glob("*.db")) if path.is_dir() else [path]
+    return tuple(str(Path(path).resolve()) for path in db_paths)
+
+
+def build_consistency_report(
+    db_paths: Union[str, Path, Sequence],
+    workers: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> List[Dict]:
+    """Строит отчёт о расхождениях переводов.
+
+    Args:
+        db_paths: Файл базы данных, список файлов шардов или каталог шардов
+        workers (int): Число процессов. По умолчанию - число ядер
+        chunk_size (int): Размер диапазона id на одну задачу
+
+    Returns:
+        Список групп с расходящимися переводами, отсортированный по
+        суммарной частоте оригинала (по убыванию)
+    """
+    chunks = [
+        chunk
+        for db_path in _resolve_paths(db_paths)
+        for chunk in _plan_chunks(db_path, chunk_size)
+    ]
+    workers = workers or os.cpu_count() or 1
+
+    groups: Dict[int, list] = {}
+    if workers <= 1 or len(chunks) <= 1:
+        for chunk in chunks:
+            _merge(groups, _scan_chunk(*chunk))
+    else:
+        # spawn: отчет строится из потока сервера, а fork при работающих
+        # потоках может унаследовать захваченную блокировку
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(chunks)),
+            mp_context=multiprocessing.get_context("spawn"),
+        ) as pool:
+            for partial in pool.map(_scan_chunk, *zip(*chunks)):
+                _merge(groups, partial)
+
+    report = []
+    for original, variants in groups.values():
+        # Расхождение между плагинами: хотя бы два варианта перевода и
+        # хотя бы два плагина (разные переводы внутри одного плагина,
+        # например по контексту в Skyrim.esm, не считаются)
+        plugins_used = set().union(*(v[2] for v in variants.values()))
+        if len(variants) < 2 or len(plugins_used) < 2:
+            continue
+        ranked = sorted(variants.values(), key=lambda v: (-v[1], v[0]))
+        report.append(
+            {
+                "original": original,
+                "occurrences": sum(v[1] for v in ranked),
+                "variants": [
+                    {
+                        "translated": translated,
+                        "count": count,
+                        "plugins": sorted(plugins.values()),
+                    }
+                    for translated, count, plugins in ranked
+                ],
+            }
+        )
+
+    report.sort(key=lambda g: (-g["occurrences"], -len(g["variants"]), g["original"]))
+    logger.info(
+        f"Consistency report: {len(report)} divergent groups "
+        f"from {len(groups)} originals ({len(chunks)} chunks)"
+    )
+    return report
+
+
+def get_consistency_report(
+    db_paths: Union[str, Path, Sequence],
+    generation: str,
+    workers: Optional[int] = None,
+) -> List[Dict]:
+    """Возвращает отчёт из кэша, перестраивая его после новой загрузки данных"""
+    key = (_resolve_paths(db_paths), generation)
+    with _cache_lock:
+        if key not in _cache:
+            report = build_consistency_report(key[0], workers=workers)
+            _cache.clear()
+            _cache[key] = report
+        return _cache[key]
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(
+        description="Отчёт о расходящихся переводах одинаковых строк"
+    )
+    arg_parser.add_argument(
+        "--db",
+        default="database/translations.db",
+        help="Файл базы или каталог поколения шардов",
+    )
+    arg_parser.add_argument("--workers", type=int, default=None)
+    arg_parser.add_argument("--limit", type=int, default=None)
+    arg_parser.add_argument("--output", default=None, help="Файл для JSON-отчёта")
+    args = arg_parser.parse_args()
+
+    result = build_consistency_report(args.db, workers=args.workers)[: args.limit]
+    payload = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(payload, encoding="utf-8")
+    else:
+        print(payload)
@@ -0,0 +1,8 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    """Каждый тест работает в своем каталоге (логи, database/)"""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
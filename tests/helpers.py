@@ -0,0 +1,96 @@
+import struct
+import zlib
+from pathlib import Path
+from typing import Dict, Tuple
+
+
+BSA_HEADER = struct.Struct("<4s8I")
+
+
+def strings_blob(strings: Dict[int, str], sized: bool = False) -> bytes:
+    """Строковая таблица Skyrim: .strings (sized=False) или .dlstrings/.ilstrings"""
+    directory = b""
+    data = b""
+    for string_id, text in strings.items():
+        directory += struct.pack("<II", string_id, len(data))
+        encoded = text.encode("utf-8") + b"\x00"
+        data += struct.pack("<I", len(encoded)) + encoded if sized else encoded
+    return struct.pack("<II", len(strings), len(data)) + directory + data
+
+
+def write_pair(directory: Path, plugin: str, pairs: Dict[int, tuple]):
+    """Создает файлы <plugin>_english.strings и <plugin>_russian.strings"""
+    directory.mkdir(parents=True, exist_ok=True)
+    eng = {string_id: eng for string_id, (eng, _) in pairs.items()}
+    rus = {string_id: rus for string_id, (_, rus) in pairs.items()}
+    (directory / f"{plugin}_english.strings").write_bytes(strings_blob(eng))
+    (directory / f"{plugin}_russian.strings").write_bytes(strings_blob(rus))
+
+
+def bsa_blob(
+    files: Dict[str, bytes],
+    version: int = 104,
+    compressed: bool = True,
+    embed_names: bool = False,
+    toggled: Tuple[str, ...] = (),
+) -> bytes:
+    """Архив BSA с файлами {"папка\\имя": данные}.
+
+    Файлы из toggled хранятся с битом 0x40000000 (сжатие инвертировано)
+    """
+    folders: Dict[str, list] = {}
+    for path, data in files.items():
+        folder, name = path.rsplit("\\", 1)
+        folders.setdefault(folder, []).append((name, data))
+
+    flags = 0x1 | 0x2 | (0x4 if compressed else 0) | (0x100 if embed_names else 0)
+    record_size = 24 if version == 105 else 16
+    folder_blocks_size = sum(
+        2 + len(folder) + 16 * len(entries) for folder, entries in folders.items()
+    )
+    names = b"".join(
+        name.encode("cp1252") + b"\x00"
+        for entries in folders.values()
+        for name, _ in entries
+    )
+    data_offset = 36 + record_size * len(folders) + folder_blocks_size + len(names)
+
+    records = b""
+    blocks = b""
+    payload = b""
+    for folder, entries in folders.items():
+        if version == 105:
+            records += struct.pack("<QIIQ", 0, len(entries), 0, 0)
+        else:
+            records += struct.pack("<QII", 0, len(entries), 0)
+        blocks += bytes([len(folder) + 1]) + folder.encode("cp1252") + b"\x00"
+        for name, data in entries:
+            path = f"{folder}\\{name}"
+            is_compressed = compressed != (path in toggled)
+            if is_compressed:
+                if version == 105:
+                    import lz4.frame
+
+                    packed = lz4.frame.compress(data)
+                else:
+                    packed = zlib.compress(data)
+                data = struct.pack("<I", len(data)) + packed
+            if embed_names and version >= 104:
+                encoded = path.encode("cp1252")
+                data = bytes([len(encoded)]) + encoded + data
+            size = len(data) | (0x40000000 if path in toggled else 0)
+            blocks += struct.pack("<QII", 0, size, data_offset + len(payload))
+            payload += data
+
+    header = BSA_HEADER.pack(
+        b"BSA\x00",
+        version,
+        36,
+        flags,
+        len(folders),
+        len(files),
+        sum(len(folder) + 1 for folder in folders),
+        len(names),
+        0,
+    )
+    return header + records + blocks + names + payload
@@ -0,0 +1,120 @@
+import pytest
+
+from core.bsa import BSAArchive, find_archive_strings
+from core.parser import find_language_pairs, parse_all_files, source_name
+from db.handler import DBHandler
+from tests.helpers import bsa_blob, strings_blob, write_pair
+
+TEXT = b"Dragonborn " * 40
+FILES = {
+    "strings\\skyrim_english.strings": TEXT,
+    "strings\\skyrim_russian.strings": "Довакин ".encode("utf-8") * 40,
+    "meshes\\sword.nif": b"\x00\x01\x02",
+}
+
+
+def _open(workdir, name="test.bsa", **kwargs) -> BSAArchive:
+    path = workdir / name
+    path.write_bytes(bsa_blob(FILES, **kwargs))
+    return BSAArchive(str(path))
+
+
+def _contents(archive: BSAArchive) -> dict:
+    return {entry.path: archive.read_entry(entry) for entry in archive.entries}
+
+
+@pytest.mark.parametrize("version", [103, 104])
+@pytest.mark.parametrize("compressed", [True, False])
+def test_read_zlib_and_uncompressed(workdir, version, compressed):
+    archive = _open(workdir, version=version, compressed=compressed)
+    assert all(entry.compressed == compressed for entry in archive.entries)
+    assert _contents(archive) == FILES
+
+
+@pytest.mark.parametrize("compressed", [True, False])
+def test_read_embedded_names(workdir, compressed):
+    archive = _open(workdir, version=104, compressed=compressed, embed_names=True)
+    assert _contents(archive) == FILES
+
+
+@pytest.mark.parametrize("compressed", [True, False])
+def test_compression_toggle_bit(workdir, compressed):
+    toggled = ("strings\\skyrim_english.strings",)
+    archive = _open(workdir, compressed=compressed, toggled=toggled)
+    flags = {entry.path: entry.compressed for entry in archive.entries}
+    assert flags["strings\\skyrim_english.strings"] == (not compressed)
+    assert flags["strings\\skyrim_russian.strings"] == compressed
+    assert _contents(archive) == FILES
+
+
+def test_read_lz4(workdir):
+    pytest.importorskip("lz4")
+    archive = _open(workdir, version=105, embed_names=True)
+    assert _contents(archive) == FILES
+
+
+def test_find_strings_skips_broken_archives(workdir):
+    _open(workdir, name="Skyrim - Interface.bsa")
+    (workdir / "Broken.bsa").write_bytes(b"not an archive")
+    with pytest.raises(ValueError):
+        BSAArchive(str(workdir / "Broken.bsa"))
+
+    entries = find_archive_strings(str(workdir))
+    assert sorted(entries) == ["skyrim_english.strings", "skyrim_russian.strings"]
+
+
+def test_loose_files_override_and_pair_with_archives(workdir):
+    data = workdir / "data"
+    data.mkdir()
+    archived = {
+        "strings\\skyrim_english.strings": strings_blob({1: "Sword"}),
+        "strings\\skyrim_russian.strings": strings_blob({1: "Меч (архив)"}),
+        "strings\\dawnguard_english.strings": strings_blob({2: "Shield"}),
+        "strings\\update_russian.strings": strings_blob({3: "Лук"}),
+    }
+    (data / "Skyrim - Interface.bsa").write_bytes(bsa_blob(archived))
+    (data / "Skyrim_russian.strings").write_bytes(strings_blob({1: "Меч"}))
+    (data / "Dawnguard_russian.STRINGS").write_bytes(strings_blob({2: "Щит"}))
+    (data / "Update_english.strings").write_bytes(strings_blob({3: "Bow"}))
+
+    pairs = {
+        (source_name(eng), source_name(rus))
+        for eng, rus in find_language_pairs(str(data))
+    }
+    assert pairs == {
+        ("skyrim_english.strings", "Skyrim_russian.strings"),
+        ("dawnguard_english.strings", "Dawnguard_russian.STRINGS"),
+        ("Update_english.strings", "update_russian.strings"),
+    }
+
+    db_handler = DBHandler()
+    parse_all_files(str(data), db_handler)
+    assert db_handler.get_translations("Skyrim") == [
+        {
+            "plugin_name": "Skyrim",
+            "original_string": "Sword",
+            "translated_string": "Меч",
+        }
+    ]
+    assert db_handler.get_translations("Dawnguard")[0]["translated_string"] == "Щит"
+    assert db_handler.get_translations("Update")[0]["translated_string"] == "Лук"
+
+
+def test_plugin_name_keeps_loose_spelling(workdir):
+    data = workdir / "data"
+    data.mkdir()
+    (data / "Skyrim - Interface.bsa").write_bytes(
+        bsa_blob(
+            {
+                "strings\\skyrim_english.strings": strings_blob({1: "Sword"}),
+                "strings\\dawnguard_english.strings": strings_blob({2: "Shield"}),
+                "strings\\dawnguard_russian.strings": strings_blob({2: "Щит"}),
+            }
+        )
+    )
+    (data / "Skyrim_russian.strings").write_bytes(strings_blob({1: "Меч"}))
+
+    db_handler = DBHandler()
+    assert sorted(parse_all_files(str(data), db_handler)) == ["Skyrim", "dawnguard"]
+    assert db_handler.search_translations("Sword", plugin_name="SKYRIM")[1] == 1
+    assert db_handler.search_translations("Shield", plugin_name="Dawnguard")[1] == 1
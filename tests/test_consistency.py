@@ -0,0 +1,94 @@
+from db.handler import DBHandler
+from services.consistency import build_consistency_report, get_consistency_report
+
+
+def make_db(path, plugins):
+    db_handler = DBHandler(str(path))
+    for plugin_name, strings in plugins.items():
+        db_handler.save_translations(plugin_name, dict(enumerate(strings)))
+    return db_handler
+
+
+def test_groups_by_normalized_original(workdir):
+    make_db(
+        workdir / "t.db",
+        {
+            "Skyrim.esm": [("Iron Sword", "Железный меч")],
+            "Patch.esp": [("iron  SWORD", "Меч из железа")],
+            "Other.esp": [("Iron Sword", "железный  меч")],
+        },
+    )
+    report = build_consistency_report(workdir / "t.db", workers=1)
+
+    assert len(report) == 1
+    group = report[0]
+    assert group["occurrences"] == 3
+    assert [v["count"] for v in group["variants"]] == [2, 1]
+    assert group["variants"][0]["plugins"] == ["Other.esp", "Skyrim.esm"]
+    assert group["variants"][1]["plugins"] == ["Patch.esp"]
+
+
+def test_variants_within_one_plugin_are_not_reported(workdir):
+    make_db(
+        workdir / "t.db",
+        {
+            "Skyrim.esm": [("Yes", "Да"), ("Yes", "Хорошо"), ("Yes", "Ага")],
+            "Dawnguard.esm": [("No", "Нет")],
+            "Patch.esp": [("No", "Нет")],
+        },
+    )
+    assert build_consistency_report(workdir / "t.db", workers=1) == []
+
+
+def test_ranked_by_frequency(workdir):
+    make_db(
+        workdir / "t.db",
+        {
+            "A.esp": [("Rare", "Редкий"), ("Common", "Частый"), ("Common", "Частый")],
+            "B.esp": [("Rare", "Редкое"), ("Common", "Обычный")],
+        },
+    )
+    report = build_consistency_report(workdir / "t.db", workers=1)
+    assert [g["original"] for g in report] == ["Common", "Rare"]
+
+
+def test_chunks_merge_to_same_result(workdir):
+    plugins = {
+        f"Mod{i}.esp": [(f"Word {j}", f"Слово {j} {i % 2}") for j in range(20)]
+        for i in range(4)
+    }
+    make_db(workdir / "t.db", plugins)
+
+    single = build_consistency_report(workdir / "t.db", workers=1)
+    chunked = build_consistency_report(workdir / "t.db", workers=1, chunk_size=7)
+    parallel = build_consistency_report(workdir / "t.db", workers=2, chunk_size=7)
+
+    assert len(single) == 20
+    assert chunked == single
+    assert parallel == single
+
+
+def test_cache_follows_writes_from_other_handlers(workdir):
+    reader = make_db(
+        workdir / "t.db",
+        {"A.esp": [("Sword", "Меч")], "B.esp": [("Sword", "Меч")]},
+    )
+    assert get_consistency_report(workdir / "t.db", reader.generation) == []
+
+    # Запись через отдельный обработчик, как при запуске парсера
+    writer = DBHandler(str(workdir / "t.db"))
+    writer.save_translations("C.esp", {1: ("Sword", "Клинок")})
+
+    report = get_consistency_report(workdir / "t.db", reader.generation)
+    assert [g["original"] for g in report] == ["Sword"]
+
+
+def test_plugin_names_compare_case_insensitively(workdir):
+    make_db(
+        workdir / "t.db",
+        {
+            "Skyrim": [("Yes", "Да")],
+            "skyrim": [("Yes", "Хорошо")],
+        },
+    )
+    assert build_consistency_report(workdir / "t.db", workers=1) == []
@@ -0,0 +1,148 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import utils.http_cache as http_cache
+from db.handler import DBHandler
+from utils.http_cache import choose_encoding, etag_matches, make_etag
+
+ETAG = make_etag("generation", {"query": "sword"})
+
+
+def test_make_etag_depends_on_generation_and_params():
+    assert ETAG.startswith('W/"')
+    assert make_etag("generation", {"query": "sword"}) == ETAG
+    assert make_etag("other", {"query": "sword"}) != ETAG
+    assert make_etag("generation", {"query": "shield"}) != ETAG
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        (None, False),
+        ("", False),
+        ("*", True),
+        (ETAG, True),
+        (ETAG.removeprefix("W/"), True),
+        (f'"other", {ETAG}', True),
+        ('W/"other"', False),
+    ],
+)
+def test_etag_matches(header, expected):
+    assert etag_matches(header, ETAG) is expected
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        (None, None),
+        ("identity", None),
+        ("gzip", "gzip"),
+        ("gzip, br", "br"),
+        ("br;q=0.5, gzip", "gzip"),
+        ("gzip;q=0.2, br;q=0.8", "br"),
+        ("br;q=0, gzip;q=0.1", "gzip"),
+        ("gzip;q=0", None),
+        ("*", "br"),
+        ("*;q=0.3, br;q=0.1", "gzip"),
+        ("gzip;q=0.5, identity", None),
+        ("gzip;q=bad", None),
+    ],
+)
+def test_choose_encoding_picks_highest_quality(monkeypatch, header, expected):
+    monkeypatch.setattr(http_cache, "brotli", object())
+    assert choose_encoding(header) == expected
+
+
+def test_choose_encoding_without_brotli(monkeypatch):
+    monkeypatch.setattr(http_cache, "brotli", None)
+    assert choose_encoding("br") is None
+    assert choose_encoding("br, gzip;q=0.1") == "gzip"
+
+
+@pytest.fixture
+def client(workdir, monkeypatch):
+    import api.v1.endpoints as endpoints
+
+    db_handler = DBHandler("search.db")
+    db_handler.save_translations(
+        "skyrim", {i: (f"Sword {i}", f"Меч {i}") for i in range(200)}
+    )
+    monkeypatch.setattr(endpoints, "db_handler", db_handler)
+    app = FastAPI()
+    app.include_router(endpoints.router, prefix="/api/v1")
+    yield TestClient(app)
+    db_handler.close()
+
+
+def test_search_not_modified(client):
+    response = client.get("/api/v1/search", params={"query": "Sword"})
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+
+    response = client.get(
+        "/api/v1/search", params={"query": "Sword"}, headers={"If-None-Match": etag}
+    )
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert response.content == b""
+
+    response = client.get(
+        "/api/v1/search", params={"query": "Меч"}, headers={"If-None-Match": etag}
+    )
+    assert response.status_code == 200
+
+
+def test_search_etag_changes_after_write_by_another_handler(client):
+    response = client.get("/api/v1/search", params={"query": "Sword"})
+    etag = response.headers["etag"]
+
+    # Другой процесс или обработчик дописывает строки в тот же файл
+    writer = DBHandler("search.db")
+    writer.save_translations("dawnguard", {1: ("Sword of Auriel", "Меч Ауриэля")})
+    writer.close()
+
+    response = client.get(
+        "/api/v1/search", params={"query": "Sword"}, headers={"If-None-Match": etag}
+    )
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert response.json()["stats"]["matches"] == 201
+
+
+def test_search_compression(client):
+    params = {"query": "Sword", "limit": 100}
+    response = client.get(
+        "/api/v1/search", params=params, headers={"Accept-Encoding": "gzip"}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert len(response.json()["results"]) == 100
+
+    response = client.get(
+        "/api/v1/search",
+        params={"query": "Sword", "limit": 1},
+        headers={"Accept-Encoding": "gzip"},
+    )
+    assert "content-encoding" not in response.headers
+
+    response = client.get(
+        "/api/v1/search", params=params, headers={"Accept-Encoding": "identity"}
+    )
+    assert "content-encoding" not in response.headers
+    assert len(response.json()["results"]) == 100
+
+
+def test_not_modified_runs_no_sqlite_queries(client):
+    import api.v1.endpoints as endpoints
+
+    etag = client.get("/api/v1/search", params={"query": "Sword"}).headers["etag"]
+    statements = []
+    endpoints.db_handler.conn.set_trace_callback(statements.append)
+
+    response = client.get(
+        "/api/v1/search", params={"query": "Sword"}, headers={"If-None-Match": etag}
+    )
+    assert response.status_code == 304
+    assert statements == []
@@ -0,0 +1,69 @@
+import asyncio
+import time
+
+import pytest
+
+from utils.loadtest import RatePacer, parse_mix, percentile, summarize
+
+
+def test_percentile_nearest_rank():
+    values = [float(i) for i in range(1, 101)]
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 95) == 95.0
+    assert percentile(values, 99) == 99.0
+    assert percentile(values, 100) == 100.0
+    assert percentile([7.0], 99) == 7.0
+    assert percentile([], 50) == 0.0
+
+
+def test_summarize():
+    summary = summarize([0.003, 0.001, 0.002, 0.004], errors=1, elapsed=2.0)
+    assert summary["requests"] == 5
+    assert summary["errors"] == 1
+    assert summary["throughput_rps"] == 2.0
+    assert summary["latency_ms"] == {
+        "p50": 2.0,
+        "p95": 4.0,
+        "p99": 4.0,
+        "mean": 2.5,
+        "max": 4.0,
+    }
+
+
+def test_summarize_without_successful_requests():
+    summary = summarize([], errors=3, elapsed=1.0)
+    assert summary["requests"] == 3
+    assert summary["throughput_rps"] == 0.0
+    assert summary["latency_ms"]["max"] == 0.0
+
+
+def test_rate_pacer_spaces_requests():
+    async def schedule():
+        pacer = RatePacer(rate=100)
+        return [await pacer.wait() for _ in range(10)]
+
+    started = time.perf_counter()
+    scheduled = asyncio.run(schedule())
+    elapsed = time.perf_counter() - started
+
+    gaps = [b - a for a, b in zip(scheduled, scheduled[1:])]
+    assert all(gap == pytest.approx(0.01) for gap in gaps)
+    assert elapsed >= 0.09
+
+
+def test_rate_pacer_unlimited():
+    async def schedule():
+        pacer = RatePacer(rate=0)
+        return [await pacer.wait() for _ in range(1000)]
+
+    started = time.perf_counter()
+    asyncio.run(schedule())
+    assert time.perf_counter() - started < 0.5
+
+
+def test_parse_mix():
+    assert parse_mix("typeahead=5, deep_offset=1,english_word") == {
+        "typeahead": 5.0,
+        "deep_offset": 1.0,
+        "english_word": 1.0,
+    }
@@ -0,0 +1,101 @@
+import threading
+
+import pytest
+
+from core.parser import parse_all_files, rebuild_database
+from db.handler import DBHandler
+from tests.helpers import write_pair
+
+OLD_ROWS = 300
+NEW_ROWS = 500
+
+
+@pytest.fixture
+def live_db(workdir):
+    write_pair(
+        workdir / "old",
+        "Skyrim",
+        {i: (f"Sword old {i}", f"Меч старый {i}") for i in range(OLD_ROWS)},
+    )
+    write_pair(
+        workdir / "new",
+        "Skyrim",
+        {i: (f"Sword new {i}", f"Меч новый {i}") for i in range(NEW_ROWS)},
+    )
+    db_handler = DBHandler()
+    parse_all_files(str(workdir / "old"), db_handler)
+    yield db_handler
+    db_handler.close()
+
+
+def test_search_sees_old_or_new_data_during_rebuild(live_db):
+    seen = []
+    errors = []
+    stop = threading.Event()
+
+    def reader():
+        while not stop.is_set():
+            try:
+                seen.append(live_db.search_translations("Sword", limit=50))
+            except Exception as e:
+                errors.append(e)
+            stop.wait(0.001)
+
+    thread = threading.Thread(target=reader)
+    thread.start()
+    try:
+        rebuild_database("new", live_db)
+        rebuild_database("new", live_db)
+    finally:
+        stop.set()
+        thread.join()
+
+    assert not errors
+    assert seen
+    for results, matches, total in seen:
+        versions = {row["original_string"].split()[1] for row in results}
+        assert (versions, matches, total) in (
+            ({"old"}, OLD_ROWS, OLD_ROWS),
+            ({"new"}, NEW_ROWS, NEW_ROWS),
+        )
+
+    assert live_db.search_translations("Sword new")[1] == NEW_ROWS
+    journal_mode = live_db.conn.execute("PRAGMA journal_mode").fetchone()[0]
+    assert journal_mode == "wal"
+    assert not live_db.shadow_path.exists()
+
+
+def test_invalid_shadow_leaves_live_database(live_db):
+    generation = live_db.generation
+    shadow = live_db.create_shadow()
+    shadow.seal()  # пустая база не проходит проверку
+
+    with pytest.raises(RuntimeError):
+        live_db.swap_in(shadow.db_path)
+
+    assert live_db.search_translations("Sword old")[1:] == (OLD_ROWS, OLD_ROWS)
+    assert live_db.generation == generation
+    assert not live_db.shadow_path.exists()
+
+
+def test_failed_rebuild_removes_shadow(live_db, workdir):
+    (workdir / "empty").mkdir()
+
+    with pytest.raises(RuntimeError):
+        rebuild_database("empty", live_db)
+
+    assert live_db.search_translations("Sword old")[1] == OLD_ROWS
+    assert not live_db.shadow_path.exists()
+
+
+def test_unreadable_pair_fails_rebuild(live_db, workdir):
+    write_pair(workdir / "new", "Dawnguard", {1: ("Shield", "Щит")})
+    truncated = workdir / "new" / "Dawnguard_english.strings"
+    truncated.write_bytes(truncated.read_bytes()[:-4])
+
+    with pytest.raises(ValueError):
+        rebuild_database("new", live_db)
+
+    assert live_db.search_translations("Sword old")[1] == OLD_ROWS
+    assert live_db.search_translations("Sword new")[1] == 0
+    assert not live_db.shadow_path.exists()
@@ -0,0 +1,151 @@
+import pytest
+
+import core.parser
+from core.parser import _build_shadow, rebuild_database
+from db.handler import DBHandler
+from db.sharded import ShardedDBHandler
+from tests.helpers import write_pair
+
+PLUGINS = ["Skyrim.esm", "Dawnguard.esm", "Patch.esp"]
+
+
+def _synthetic_rows():
+    """Строки с уникальной длиной оригинала, чтобы порядок был однозначным.
+
+    Префиксы дают все три значения match_priority для запроса "sword"
+    """
+    rows = {plugin: {} for plugin in PLUGINS}
+    for i in range(90):
+        prefix = ("sword", "Sword of ", "Iron sword ")[i % 3]
+        original = prefix + "x" * (i + 12 - len(prefix))
+        rows[PLUGINS[i % len(PLUGINS)]][i] = (original, f"меч {i}")
+    rows["Patch.esp"][1000] = ("shield", "щит")
+    return rows
+
+
+@pytest.fixture
+def stores(workdir):
+    single = DBHandler("single.db")
+    sharded = ShardedDBHandler("shards", workers=1)
+    for plugin, strings in _synthetic_rows().items():
+        single.save_translations(plugin, strings)
+        sharded.save_translations(plugin, strings)
+    yield single, sharded
+    single.close()
+    sharded.close()
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+@pytest.mark.parametrize("offset", [0, 7, 20, 45, 85, 100])
+def test_merge_matches_single_file_ranking(stores, workers, offset):
+    single, sharded = stores
+    sharded.workers = workers
+
+    expected = single.search_translations("sword", offset=offset, limit=20)
+    actual = sharded.search_translations("sword", offset=offset, limit=20)
+
+    assert [row["original_string"] for row in actual[0]] == [
+        row["original_string"] for row in expected[0]
+    ]
+    assert actual[1:] == expected[1:] == (90, 91)
+
+
+def test_plugin_filter_counts_all_shards(stores):
+    single, sharded = stores
+
+    expected = single.search_translations("sword", plugin_name="Patch.esp")
+    actual = sharded.search_translations("sword", plugin_name="Patch.esp")
+
+    assert actual == expected
+    assert actual[1:] == (30, 91)
+    assert sharded.search_translations("sword", plugin_name="Missing.esp") == (
+        [],
+        0,
+        91,
+    )
+
+
+def test_failed_rebuild_leaves_no_orphan_directory(workdir, monkeypatch):
+    sharded = ShardedDBHandler("shards")
+    sharded.save_translations("Skyrim.esm", {1: ("Sword", "Меч")})
+    generations_before = sorted(p.name for p in (workdir / "shards").iterdir())
+
+    def broken_parse(directory, db_handler, strict=False):
+        db_handler.save_translations("Skyrim.esm", {1: ("Sword", "Меч")})
+        raise RuntimeError("parse failed")
+
+    monkeypatch.setattr(core.parser, "parse_all_files", broken_parse)
+    with pytest.raises(RuntimeError):
+        _build_shadow("strings", ShardedDBHandler, "shards")
+
+    (workdir / "empty").mkdir()
+    monkeypatch.undo()
+    monkeypatch.chdir(workdir)
+    with pytest.raises(RuntimeError):
+        rebuild_database("empty", sharded)
+
+    assert sorted(p.name for p in (workdir / "shards").iterdir()) == generations_before
+    assert sharded.search_translations("Sword")[1] == 1
+    sharded.close()
+
+
+def test_swap_removes_old_generation(workdir):
+    write_pair(workdir / "strings", "Skyrim", {1: ("Sword", "Меч")})
+    sharded = ShardedDBHandler("shards", workers=2)
+    sharded.save_translations("Skyrim.esm", {1: ("Shield", "Щит")})
+    old_dir = sharded.shard_dir
+    # Процессы пула держат соединения со старыми шардами
+    assert sharded.search_translations("Shield")[1] == 1
+
+    assert rebuild_database("strings", sharded) == 1
+
+    assert not old_dir.exists()
+    assert sharded.shard_dir != old_dir
+    assert (workdir / "shards" / "CURRENT").read_text() == sharded.shard_dir.name
+    assert sharded.search_translations("Shield")[1] == 0
+    assert sharded.search_translations("Sword")[1] == 1
+    sharded.close()
+
+
+def test_plugin_filter_recounts_only_changed_shards(stores, monkeypatch):
+    _, sharded = stores
+    assert sharded.search_translations("sword", plugin_name="Patch.esp")[2] == 91
+
+    counted = []
+    count_translations = DBHandler.count_translations
+
+    def counting(handler):
+        counted.append(handler.db_path.stem)
+        return count_translations(handler)
+
+    monkeypatch.setattr(DBHandler, "count_translations", counting)
+    assert sharded.search_translations("sword", plugin_name="Patch.esp")[2] == 91
+    assert counted == []
+
+    sharded.save_translations("Dawnguard.esm", {500: ("Bow", "Лук")})
+    assert sharded.search_translations("sword", plugin_name="Patch.esp")[2] == 92
+    assert counted == ["dawnguard.esm"]
+
+
+def test_in_process_search_uses_leased_shards(stores):
+    import db.sharded
+
+    _, sharded = stores
+    db.sharded._worker_handlers.clear()
+    assert sharded.search_translations("sword")[1] == 90
+    assert db.sharded._worker_handlers == {}
+
+
+def test_generation_runs_no_sqlite_queries(stores):
+    _, sharded = stores
+    generation = sharded.generation
+    statements = []
+    for shard in sharded._shards.values():
+        shard.conn.set_trace_callback(statements.append)
+
+    assert sharded.generation == generation
+    assert statements == []
+    assert sharded._pool is None
+
+    sharded.save_translations("Patch.esp", {2000: ("Axe", "Топор")})
+    assert sharded.generation != generation
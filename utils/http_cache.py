@@ -0,0 +1,113 @@
+"""HTTP-кэширование ответов поиска: ETag, условные запросы и сжатие.
+
+Настройки берутся из переменных окружения:
+    SEARCH_CACHE_CONTROL  - значение заголовка Cache-Control
+                            (по умолчанию "public, no-cache": кэши хранят
+                            ответ, но перепроверяют его по ETag)
+    COMPRESSION_MIN_SIZE  - минимальный размер тела в байтах для сжатия
+                            (по умолчанию 1024)
+"""
+
+import gzip
+import hashlib
+import json
+import os
+from typing import Dict, Optional
+
+from fastapi import Response
+
+try:
+    import brotli  # type: ignore[import]
+except ImportError:  # brotli необязателен, без него используется gzip
+    brotli = None
+
+CACHE_CONTROL = os.environ.get("SEARCH_CACHE_CONTROL", "public, no-cache")
+COMPRESSION_MIN_SIZE = int(os.environ.get("COMPRESSION_MIN_SIZE", "1024"))
+
+
+def make_etag(generation: str, params: Dict) -> str:
+    """Слабый ETag из поколения базы и нормализованных параметров запроса.
+
+    Параметры сериализуются с сортировкой ключей, поэтому запросы,
+    отличающиеся только порядком или явным указанием значений
+    по умолчанию, получают один и тот же ETag.
+    """
+    key = json.dumps([generation, params], sort_keys=True, ensure_ascii=False)
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).hexdigest()
+    return f'W/"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Проверка If-None-Match (слабое сравнение, RFC 9110)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque
+        for candidate in if_none_match.split(",")
+    )
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Выбирает br или gzip по заголовку Accept-Encoding.
+
+    Берется кодировка с наибольшим q; при равных q предпочитается br
+    (если установлен brotli). Если identity явно указан с большим q,
+    ответ не сжимается.
+    """
+    accepted = {}
+    for item in (accept_encoding or "").split(","):
+        coding, _, params = item.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding.strip().lower()] = q
+
+    def quality(coding: str) -> float:
+        return accepted.get(coding, accepted.get("*", 0.0))
+
+    candidates = ["br", "gzip"] if brotli is not None else ["gzip"]
+    best = max(candidates, key=quality)
+    if quality(best) <= 0 or accepted.get("identity", 0.0) > quality(best):
+        return None
+    return best
+
+
+def not_modified_response(etag: str) -> Response:
+    return Response(
+        status_code=304,
+        headers={
+            "ETag": etag,
+            "Cache-Control": CACHE_CONTROL,
+            "Vary": "Accept-Encoding",
+        },
+    )
+
+
+def cached_json_response(
+    payload: Dict, etag: str, accept_encoding: Optional[str]
+) -> Response:
+    """JSON-ответ с ETag, Cache-Control и сжатием больших тел"""
+    body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode(
+        "utf-8"
+    )
+    headers = {
+        "ETag": etag,
+        "Cache-Control": CACHE_CONTROL,
+        "Vary": "Accept-Encoding",
+    }
+
+    encoding = choose_encoding(accept_encoding)
+    if encoding and len(body) >= COMPRESSION_MIN_SIZE:
+        if encoding == "br":
+            body = brotli.compress(body, quality=5)
+        else:
+            body = gzip.compress(body, compresslevel=6)
+        headers["Content-Encoding"] = encoding
+
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,428 @@
+"""Нагрузочное тестирование /api/v1/search на localhost.
+
+Запускает приложение из main.py в отдельном процессе поверх синтетической
+базы, воспроизводит смесь типичных запросов с заданной конкурентностью
+и частотой и выводит пропускную способность и перцентили задержки
+по каждому сценарию в виде JSON.
+
+Пример:
+    python -m utils.loadtest --rows 200000 --concurrency 16 --duration 30
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import multiprocessing
+import os
+import random
+import shutil
+import socket
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlencode
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+# Пары слов для синтетической базы: (английский, русский)
+VOCABULARY = [
+    ("dragon", "дракон"),
+    ("sword", "меч"),
+    ("iron", "железный"),
+    ("steel", "стальной"),
+    ("shield", "щит"),
+    ("armor", "броня"),
+    ("helmet", "шлем"),
+    ("potion", "зелье"),
+    ("health", "здоровье"),
+    ("magicka", "магия"),
+    ("stamina", "запас сил"),
+    ("scroll", "свиток"),
+    ("spell", "заклинание"),
+    ("fire", "огонь"),
+    ("frost", "мороз"),
+    ("shock", "молния"),
+    ("soul", "душа"),
+    ("gem", "камень"),
+    ("ring", "кольцо"),
+    ("amulet", "амулет"),
+    ("book", "книга"),
+    ("key", "ключ"),
+    ("chest", "сундук"),
+    ("door", "дверь"),
+    ("cave", "пещера"),
+    ("tower", "башня"),
+    ("city", "город"),
+    ("guard", "стражник"),
+    ("bandit", "бандит"),
+    ("wolf", "волк"),
+    ("bear", "медведь"),
+    ("giant", "великан"),
+    ("ancient", "древний"),
+    ("nord", "норд"),
+    ("jarl", "ярл"),
+    ("temple", "храм"),
+    ("daedric", "даэдрический"),
+    ("ebony", "эбонитовый"),
+    ("glass", "стеклянный"),
+    ("elven", "эльфийский"),
+    ("bow", "лук"),
+    ("arrow", "стрела"),
+    ("dagger", "кинжал"),
+    ("axe", "топор"),
+    ("mace", "булава"),
+    ("shout", "крик"),
+    ("word", "слово"),
+    ("power", "сила"),
+    ("quest", "задание"),
+    ("reward", "награда"),
+    ("gold", "золото"),
+    ("the", "этот"),
+    ("of", "из"),
+    ("and", "и"),
+]
+
+DEFAULT_MIX = "cyrillic_prefix=4,english_word=3,deep_offset=1,typeahead=2"
+
+
+def _open_handler(db_path: str, sharded: bool):
+    from db.handler import DBHandler
+    from db.sharded import ShardedDBHandler
+
+    return ShardedDBHandler(db_path) if sharded else DBHandler(db_path)
+
+
+def build_synthetic_database(
+    db_path: str, rows: int, seed: int = 0, sharded: bool = False
+) -> int:
+    """Заполняет базу синтетическими строками.
+
+    Половина строк приходится на один большой плагин (как Skyrim.esm),
+    остальные распределяются по мелким модам. Длины строк варьируются
+    от названий предметов до реплик диалогов. При sharded=True db_path -
+    корневой каталог шардированного хранилища.
+    """
+    rng = random.Random(seed)
+    db_handler = _open_handler(db_path, sharded)
+    plugins = ["Skyrim.esm"] * 10 + [f"SyntheticMod{i:03d}.esp" for i in range(10)]
+    batches: Dict[str, Dict[int, Tuple[str, str]]] = {}
+    for index in range(rows):
+        length = rng.choice((1, 2, 2, 3, 3, 4, 6, 12, 30))
+        words = [rng.choice(VOCABULARY) for _ in range(length)]
+        original = " ".join(eng for eng, _ in words).capitalize()
+        translated = " ".join(rus for _, rus in words).capitalize()
+        batches.setdefault(rng.choice(plugins), {})[index] = (original, translated)
+
+    saved = 0
+    for plugin_name, strings in batches.items():
+        saved += db_handler.save_translations(plugin_name, strings)
+    db_handler.close()
+    return saved
+
+
+class Scenario:
+    """Генератор запросов одного типа.
+
+    next_requests() возвращает последовательность путей, которые один
+    виртуальный пользователь отправляет подряд (для type-ahead это
+    нарастающие префиксы одного слова).
+    """
+
+    def __init__(self, name: str, rng: random.Random):
+        self.name = name
+        self.rng = rng
+
+    @staticmethod
+    def _path(query: str, offset: int = 0, limit: int = 20) -> str:
+        params = {
+            "query": query,
+            "case_insensitive": "true",
+            "offset": offset,
+            "limit": limit,
+        }
+        return f"/api/v1/search?{urlencode(params)}"
+
+    def next_requests(self) -> List[str]:
+        if self.name == "cyrillic_prefix":
+            word = self.rng.choice(VOCABULARY)[1]
+            return [self._path(word[: self.rng.randint(2, 4)])]
+        if self.name == "english_word":
+            return [self._path(self.rng.choice(VOCABULARY)[0])]
+        if self.name == "deep_offset":
+            word = self.rng.choice(VOCABULARY)[0]
+            return [self._path(word, offset=self.rng.randrange(500, 5000, 20))]
+        if self.name == "typeahead":
+            word = self.rng.choice(VOCABULARY)[1]
+            return [self._path(word[:size]) for size in range(1, len(word) + 1)]
+        raise ValueError(f"Unknown scenario: {self.name}")
+
+
+class HTTPConnection:
+    """Минимальный HTTP/1.1 клиент с keep-alive поверх asyncio"""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+
+    async def get(self, path: str) -> Tuple[int, bytes]:
+        if self.reader is None or self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(
+                self.host, self.port
+            )
+        reader, writer = self.reader, self.writer
+        writer.write(
+            f"GET {path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\n\r\n".encode()
+        )
+        await writer.drain()
+
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionError("Connection closed by server")
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            body = b""
+            while True:
+                size = int((await reader.readline()).strip(), 16)
+                chunk = await reader.readexactly(size + 2)
+                if size == 0:
+                    break
+                body += chunk[:-2]
+        else:
+            body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+        if headers.get("connection", "").lower() == "close":
+            await self.close()
+        return status, body
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+            self.reader = None
+
+
+class RatePacer:
+    """Выдает моменты отправки запросов с общей частотой rate (запросов/с)"""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self.next_time = time.perf_counter()
+
+    async def wait(self) -> float:
+        """Ждет своей очереди и возвращает запланированное время отправки"""
+        if not self.interval:
+            return time.perf_counter()
+        scheduled = self.next_time = max(self.next_time, time.perf_counter() - 1.0)
+        self.next_time += self.interval
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return scheduled
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """Перцентиль методом ближайшего ранга"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict:
+    values = sorted(latencies)
+    return {
+        "requests": len(values) + errors,
+        "errors": errors,
+        "throughput_rps": round(len(values) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(values, 50) * 1000, 2),
+            "p95": round(percentile(values, 95) * 1000, 2),
+            "p99": round(percentile(values, 99) * 1000, 2),
+            "mean": round(sum(values) / len(values) * 1000, 2) if values else 0.0,
+            "max": round(values[-1] * 1000, 2) if values else 0.0,
+        },
+    }
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    weights = {}
+    for item in mix.split(","):
+        name, _, weight = item.partition("=")
+        weights[name.strip()] = float(weight or 1)
+    return weights
+
+
+async def run_load(
+    host: str,
+    port: int,
+    mix: Dict[str, float],
+    concurrency: int,
+    rate: float,
+    duration: float,
+    seed: int = 0,
+) -> Dict:
+    """Запускает виртуальных пользователей и собирает статистику.
+
+    При заданной частоте задержка считается от запланированного момента
+    отправки, а не от фактического, чтобы очередь на стороне клиента
+    не скрывала деградацию сервера.
+    """
+    pacer = RatePacer(rate)
+    latencies: Dict[str, List[float]] = {name: [] for name in mix}
+    errors: Dict[str, int] = {name: 0 for name in mix}
+    names, weights = list(mix), list(mix.values())
+    deadline = time.perf_counter() + duration
+
+    async def user(user_id: int):
+        rng = random.Random(seed * 1000 + user_id)
+        scenarios = {name: Scenario(name, rng) for name in names}
+        conn = HTTPConnection(host, port)
+        try:
+            while time.perf_counter() < deadline:
+                name = rng.choices(names, weights)[0]
+                for path in scenarios[name].next_requests():
+                    started = await pacer.wait()
+                    try:
+                        status, body = await conn.get(path)
+                        if status != 200 or "error" in json.loads(body):
+                            errors[name] += 1
+                            continue
+                    except (OSError, ValueError, asyncio.IncompleteReadError):
+                        errors[name] += 1
+                        await conn.close()
+                        continue
+                    latencies[name].append(time.perf_counter() - started)
+        finally:
+            await conn.close()
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(user(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started_at
+
+    all_latencies = [value for values in latencies.values() for value in values]
+    return {
+        "scenarios": {
+            name: summarize(latencies[name], errors[name], elapsed) for name in names
+        },
+        "total": summarize(all_latencies, sum(errors.values()), elapsed),
+        "elapsed_s": round(elapsed, 2),
+    }
+
+
+def _serve(db_path: str, port: int, sharded: bool = False):
+    """Точка входа процесса сервера"""
+    os.chdir(ROOT_DIR)
+    import uvicorn
+
+    import api.v1.endpoints as endpoints
+    from main import app
+
+    endpoints.db_handler = _open_handler(db_path, sharded)
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_until_ready(port: int, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise TimeoutError(f"Server did not start on port {port}")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(
+        description="Нагрузочный тест /api/v1/search на localhost"
+    )
+    arg_parser.add_argument(
+        "--db",
+        default=None,
+        help="По умолчанию database/loadtest.db или database/loadtest_shards",
+    )
+    arg_parser.add_argument(
+        "--sharded",
+        action="store_true",
+        help="Шардированное хранилище (ShardedDBHandler) вместо одного файла",
+    )
+    arg_parser.add_argument("--rows", type=int, default=100_000)
+    arg_parser.add_argument(
+        "--rebuild", action="store_true", help="Пересоздать синтетическую базу"
+    )
+    arg_parser.add_argument("--concurrency", type=int, default=8)
+    arg_parser.add_argument(
+        "--rate", type=float, default=0, help="Запросов в секунду, 0 - без ограничения"
+    )
+    arg_parser.add_argument("--duration", type=float, default=20)
+    arg_parser.add_argument("--mix", default=DEFAULT_MIX)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--output", default=None, help="Файл для JSON-отчёта")
+    args = arg_parser.parse_args()
+
+    default_db = "database/loadtest_shards" if args.sharded else "database/loadtest.db"
+    db_path = Path(args.db or default_db).resolve()
+    if args.rebuild or not db_path.exists():
+        if args.sharded:
+            shutil.rmtree(db_path, ignore_errors=True)
+        else:
+            for suffix in ("", "-wal", "-shm"):
+                Path(f"{db_path}{suffix}").unlink(missing_ok=True)
+        build_synthetic_database(str(db_path), args.rows, args.seed, args.sharded)
+
+    port = _free_port()
+    server = multiprocessing.Process(
+        target=_serve, args=(str(db_path), port, args.sharded)
+    )
+    server.start()
+    try:
+        _wait_until_ready(port)
+        report = asyncio.run(
+            run_load(
+                "127.0.0.1",
+                port,
+                parse_mix(args.mix),
+                args.concurrency,
+                args.rate,
+                args.duration,
+                args.seed,
+            )
+        )
+    finally:
+        server.terminate()
+        server.join()
+
+    report["config"] = {
+        "db": str(db_path),
+        "sharded": args.sharded,
+        "concurrency": args.concurrency,
+        "rate": args.rate,
+        "duration": args.duration,
+        "mix": parse_mix(args.mix),
+    }
+    payload = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(payload, encoding="utf-8")
+    else:
+        print(payload)
+
+
+if __name__ == "__main__":
+    main()